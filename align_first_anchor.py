@@ -23,30 +23,80 @@ Outputs:
   - Optional similarity plot PNG (--similarity-png).
 
 Dependencies (pip):
-  numpy, librosa, matplotlib, scipy
+  numpy, librosa, matplotlib, scipy, soundfile, pillow
+  numba (optional; speeds up gating and the content-mode scan)
 """
 
 import argparse
+import hashlib
 import os
 import sys
 import json
 import subprocess
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from typing import Tuple, Optional
 
 import numpy as np
-import scipy.signal as spsig
+import scipy.fft as spfft
+from scipy.linalg.blas import snrm2
 import librosa
+import soundfile as sf
 import matplotlib
 matplotlib.use("Agg")
 import matplotlib.pyplot as plt
+from PIL import Image, ImageDraw
+
+try:
+    from numba import njit
+    HAVE_NUMBA = True
+except ImportError:  # pragma: no cover - numba is optional
+    HAVE_NUMBA = False
+
+    def njit(*args, **kwargs):
+        """Stand-in for numba.njit so kernels still import without numba."""
+        def _wrap(fn):
+            return fn
+        return _wrap
+
+
+# MFCC frame hop (samples) for content mode; librosa's default hop_length
+MFCC_HOP = 512
+
+# Sample rate for the coarse xcorr pass; the peak is then refined at full rate
+XCORR_ANALYSIS_SR = 8000
+
+# Content-mode template vectors kept by template_mfcc_vector
+TEMPLATE_CACHE_SIZE = 64
+_TEMPLATE_CACHE: "OrderedDict[tuple, np.ndarray]" = OrderedDict()
+_TEMPLATE_CACHE_LOCK = threading.Lock()
+
+# Render the diagnostic PNGs with matplotlib (axes, labels) instead of the
+# direct numpy rasterizer; slower, mostly useful for debugging
+USE_MPL = os.environ.get("ALIGN_USE_MPL", "0") == "1"
 
 
 # --------------------------- Utilities ---------------------------
 
 def load_mono(path: str, sr: int) -> Tuple[np.ndarray, int]:
-    """Load audio as mono float32 at target sample rate."""
-    y, _sr = librosa.load(path, sr=sr, mono=True)
-    return y.astype(np.float32), sr
+    """
+    Load audio as mono float32 at target sample rate.
+
+    Decodes with libsndfile (soundfile) and resamples with a polyphase
+    filter; formats libsndfile cannot open fall back to librosa.load.
+    """
+    try:
+        y, file_sr = sf.read(path, dtype="float32", always_2d=False)
+    except sf.LibsndfileError:
+        y, _sr = librosa.load(path, sr=sr, mono=True)
+        return np.ascontiguousarray(y, dtype=np.float32), sr
+
+    if y.ndim == 2:
+        y = y.mean(axis=1, dtype=np.float32)
+    if file_sr != sr:
+        y = librosa.resample(y, orig_sr=file_sr, target_sr=sr, res_type="polyphase")
+    return np.ascontiguousarray(y, dtype=np.float32), sr
 
 
 def apply_gate_db(y: np.ndarray, threshold_db: Optional[float]) -> np.ndarray:
@@ -56,13 +106,45 @@ def apply_gate_db(y: np.ndarray, threshold_db: Optional[float]) -> np.ndarray:
     """
     if threshold_db is None:
         return y
-    eps = 1e-12
-    mag = np.abs(y) + eps
-    db = 20.0 * np.log10(mag)
-    gated = np.where(db < threshold_db, 0.0, y)
+    # 20*log10(|y|) < threshold_db  <=>  |y| < 10**(threshold_db/20)
+    thr_lin = np.float32(10.0 ** (threshold_db / 20.0))
+    if HAVE_NUMBA:
+        return _gate_kernel(np.ascontiguousarray(y, dtype=np.float32), thr_lin)
+    gated = y.copy()
+    gated[np.abs(y) < thr_lin] = 0.0
     return gated
 
 
+# Serial on purpose: jobs gate from several threads at once, and numba's
+# fallback 'workqueue' threading layer aborts on concurrent parallel calls.
+# The pass is memory-bound, so parallelism gained little anyway.
+@njit(cache=True, fastmath=True)
+def _gate_kernel(y, thr_lin):
+    """Single pass over 'y': copy samples, zeroing those with |y| < thr_lin."""
+    out = np.empty_like(y)
+    for i in range(y.size):
+        v = y[i]
+        out[i] = 0.0 if abs(v) < thr_lin else v
+    return out
+
+
+if HAVE_NUMBA:
+    # Compile (or load from numba's on-disk cache) at import time, so the
+    # first alignment job doesn't pay for it
+    _gate_kernel(np.zeros(1, dtype=np.float32), np.float32(0.0))
+
+
+def _zero_mean_f32(x: np.ndarray, size: Optional[int] = None) -> np.ndarray:
+    """
+    float32 copy of 'x' minus its mean (float64 accumulator) in one pass,
+    zero-padded to 'size' samples if given.
+    """
+    size = x.size if size is None else size
+    out = np.empty(size, dtype=np.float32) if size == x.size else np.zeros(size, dtype=np.float32)
+    np.subtract(x, np.float32(x.mean(dtype=np.float64)), out=out[:x.size])
+    return out
+
+
 def estimate_offset_seconds(a: np.ndarray,
                             b: np.ndarray,
                             sr: int,
@@ -78,34 +160,152 @@ def estimate_offset_seconds(a: np.ndarray,
     if a.size == 0 or b.size == 0:
         return 0.0, np.array([0.0], dtype=float), np.array([1.0], dtype=float)
 
-    # Zero-mean float32
-    a0 = (a - np.mean(a)).astype(np.float32, copy=False)
-    b0 = (b - np.mean(b)).astype(np.float32, copy=False)
-
-    # Full correlation via FFT
-    corr_full = spsig.correlate(a0, b0, mode="full", method="fft")
-    lags_full = np.arange(-b0.size + 1, a0.size, dtype=int)
-
     # Bound the search window in samples
     if max_search is not None and max_search > 0:
         max_lag = int(max_search * sr)
     else:
-        max_lag = min(a0.size, b0.size) - 1
+        max_lag = min(a.size, b.size) - 1
+
+    # Lags that actually exist on each side of zero
+    neg_lag = min(max_lag, b.size - 1)
+    pos_lag = min(max_lag, a.size - 1)
+
+    # Correlation via real FFTs: irfft(A * conj(B)) is the circular
+    # correlation, with lag k >= 0 at index k and lag -k at index n - k.
+    # Only lags in [-neg_lag, pos_lag] are kept, so the transform just has
+    # to be alias-free over that band rather than over the full |a|+|b|-1.
+    n = spfft.next_fast_len(max(a.size + neg_lag, b.size + pos_lag), real=True)
+
+    # Zero-mean float32, written straight into the zero-padded FFT inputs
+    a0 = _zero_mean_f32(a, n)
+    b0 = _zero_mean_f32(b, n)
+    A = spfft.rfft(a0, workers=-1)
+    B = spfft.rfft(b0, workers=-1)
+    np.conjugate(B, out=B)
+    A *= B
+    circ = spfft.irfft(A, n, workers=-1)
+    # corr[i] holds lag i - neg_lag
+    corr = np.concatenate((circ[n - neg_lag:], circ[:pos_lag + 1]))
+
+    # Normalize (BLAS nrm2: no squared temporaries), in place on the band
+    denom = float(snrm2(a0)) * float(snrm2(b0)) + 1e-12
+    corr_norm = corr.astype(np.float32, copy=False)
+    corr_norm *= np.float32(1.0 / denom)
+
+    # Best lag, refined to sub-sample precision with a parabolic fit
+    best_idx = int(np.argmax(corr_norm))
+    best_lag = best_idx - neg_lag + _parabolic_peak(corr_norm, best_idx)
+    offset_sec = -best_lag / float(sr)
 
-    keep = (lags_full >= -max_lag) & (lags_full <= max_lag)
-    corr = corr_full[keep]
-    lags = lags_full[keep]
+    # Lag axis in seconds, built once for the kept window only
+    lags_sec = np.arange(-neg_lag, pos_lag + 1, dtype=np.float32)
+    lags_sec *= np.float32(1.0 / sr)
 
-    # Normalize
-    denom = np.sqrt(np.sum(a0 * a0) * np.sum(b0 * b0)) + 1e-12
-    corr_norm = (corr / denom).astype(np.float32, copy=False)
+    return offset_sec, lags_sec, corr_norm
 
-    # Best lag
-    best_idx = int(np.argmax(corr_norm))
-    best_lag = int(lags[best_idx])
-    offset_sec = -best_lag / float(sr)
 
-    return offset_sec, (lags / float(sr)).astype(np.float32, copy=False), corr_norm
+def _parabolic_peak(y: np.ndarray, idx: int) -> float:
+    """
+    Sub-sample position of the peak at y[idx] relative to idx, from a
+    3-point parabola fit. Returns 0.0 at the edges or if y is not concave there.
+    """
+    if idx <= 0 or idx >= y.size - 1:
+        return 0.0
+    y0, y1, y2 = float(y[idx - 1]), float(y[idx]), float(y[idx + 1])
+    denom = y0 - 2.0 * y1 + y2
+    if denom >= 0.0:
+        return 0.0
+    return 0.5 * (y0 - y2) / denom
+
+
+def refine_offset_seconds(a: np.ndarray,
+                          b: np.ndarray,
+                          sr: int,
+                          offset_sec: float,
+                          radius_sec: float = 0.002) -> float:
+    """
+    Refine an xcorr offset at full rate: evaluate the correlation directly
+    over +/- radius_sec around 'offset_sec' and fit a parabola to the peak.
+
+    Uses the same sign convention as estimate_offset_seconds.
+    """
+    if a.size == 0 or b.size == 0:
+        return offset_sec
+
+    a0 = _zero_mean_f32(a)
+    b0 = _zero_mean_f32(b)
+
+    center = int(round(-offset_sec * sr))
+    radius = max(1, int(np.ceil(radius_sec * sr)))
+    lags = np.arange(center - radius, center + radius + 1)
+
+    # corr[lag] = sum_n a0[n + lag] * b0[n]
+    corr = np.zeros(lags.size, dtype=np.float64)
+    for i, lag in enumerate(lags):
+        if lag >= 0:
+            m = min(a0.size - lag, b0.size)
+            if m > 0:
+                corr[i] = np.dot(a0[lag:lag + m], b0[:m])
+        else:
+            m = min(a0.size, b0.size + lag)
+            if m > 0:
+                corr[i] = np.dot(a0[:m], b0[-lag:-lag + m])
+
+    best_idx = int(np.argmax(corr))
+    best_lag = lags[best_idx] + _parabolic_peak(corr, best_idx)
+    return -best_lag / float(sr)
+
+
+def estimate_offset_multirate(a: np.ndarray,
+                              b: np.ndarray,
+                              sr: int,
+                              max_search: Optional[float],
+                              analysis_sr: int = XCORR_ANALYSIS_SR) -> Tuple[float, np.ndarray, np.ndarray]:
+    """
+    Coarse-to-fine xcorr: run estimate_offset_seconds on copies resampled to
+    'analysis_sr', then refine the offset at 'sr' with refine_offset_seconds.
+
+    Returns the same (offset_sec, lags_sec, norm_corr) triple as
+    estimate_offset_seconds; the similarity curve is the coarse one.
+    """
+    if not analysis_sr or analysis_sr >= sr or a.size == 0 or b.size == 0:
+        return estimate_offset_seconds(a, b, sr, max_search)
+
+    a_lo = librosa.resample(a, orig_sr=sr, target_sr=analysis_sr, res_type="polyphase")
+    b_lo = librosa.resample(b, orig_sr=sr, target_sr=analysis_sr, res_type="polyphase")
+    coarse_sec, lags_sec, corr_norm = estimate_offset_seconds(a_lo, b_lo, analysis_sr, max_search)
+
+    radius_sec = max(0.002, 2.0 / analysis_sr)
+    offset_sec = refine_offset_seconds(a, b, sr, coarse_sec, radius_sec=radius_sec)
+    return offset_sec, lags_sec, corr_norm
+
+
+def template_mfcc_vector(tmpl: np.ndarray, sr: int, n_mfcc: int = 20) -> np.ndarray:
+    """
+    Mean MFCC vector of a content-mode template.
+
+    Results are cached by a digest of the template samples, so aligning the
+    same in-house file against several externals computes it only once.
+    """
+    tmpl = np.ascontiguousarray(tmpl)
+    digest = hashlib.blake2b(tmpl.data, digest_size=16).digest()
+    key = (digest, tmpl.dtype.str, tmpl.size, sr, n_mfcc)
+
+    with _TEMPLATE_CACHE_LOCK:
+        v1 = _TEMPLATE_CACHE.get(key)
+        if v1 is not None:
+            _TEMPLATE_CACHE.move_to_end(key)
+            return v1
+
+    tmpl_mfcc = librosa.feature.mfcc(y=tmpl, sr=sr, n_mfcc=n_mfcc, hop_length=MFCC_HOP)
+    v1 = np.mean(tmpl_mfcc, axis=1)
+    v1.setflags(write=False)
+
+    with _TEMPLATE_CACHE_LOCK:
+        _TEMPLATE_CACHE[key] = v1
+        while len(_TEMPLATE_CACHE) > TEMPLATE_CACHE_SIZE:
+            _TEMPLATE_CACHE.popitem(last=False)
+    return v1
 
 
 def find_content_anchor(a_an: np.ndarray,
@@ -113,40 +313,196 @@ def find_content_anchor(a_an: np.ndarray,
                         sr: int,
                         template_sec: float,
                         hop_sec: float,
-                        min_sim: float) -> Optional[float]:
+                        min_sim: float,
+                        v1: Optional[np.ndarray] = None) -> Optional[float]:
     """
     Slide a template from 'a_an' across 'b_an' and return the FIRST b-time (sec)
     where cosine(MFCC_mean(template), MFCC_mean(window)) >= min_sim.
+
+    The MFCCs of 'b_an' are computed once; window means are taken over
+    MFCC frames via prefix sums, so candidate starts fall on the MFCC hop
+    (MFCC_HOP samples) and are visited every ~hop_sec. 'v1' may be given as
+    a precomputed template_mfcc_vector of the template.
     """
     tmpl_len = int(template_sec * sr)
-    if len(a_an) < tmpl_len:
+    if len(a_an) < tmpl_len or tmpl_len <= 0 or len(b_an) == 0:
         return None
 
-    tmpl = a_an[:tmpl_len]
-    tmpl_mfcc = librosa.feature.mfcc(y=tmpl, sr=sr, n_mfcc=20)
-    v1 = np.mean(tmpl_mfcc, axis=1)
+    if v1 is None:
+        v1 = template_mfcc_vector(a_an[:tmpl_len], sr)
+
+    # One MFCC pass over the whole search region
+    b_mfcc = librosa.feature.mfcc(y=b_an, sr=sr, n_mfcc=20, hop_length=MFCC_HOP)
+    # Template frame count (librosa centers frames: 1 + len // hop)
+    k = min(1 + tmpl_len // MFCC_HOP, b_mfcc.shape[1])
+
+    # Sliding window sums over k frames (the 1/k of the mean cancels in
+    # cosine), laid out one window per row.
+    csum = np.zeros((b_mfcc.shape[1] + 1, b_mfcc.shape[0]), dtype=np.float64)
+    np.cumsum(b_mfcc.T, axis=0, out=csum[1:])
+    win = csum[k:] - csum[:-k]
+    v1 = v1.astype(np.float64)
+
+    # Only consider starts on the requested hop grid
+    step = max(1, int(round(hop_sec * sr / MFCC_HOP)))
+
+    if HAVE_NUMBA:
+        first = _first_hit(v1, win, step, min_sim)
+    else:
+        win = win[::step]
+        v1_norm = v1 / (np.linalg.norm(v1) + 1e-12)
+        sims = (win @ v1_norm) / (np.linalg.norm(win, axis=1) + 1e-12)
+        hits = sims >= min_sim
+        first = int(np.argmax(hits)) * step if hits.any() else -1
+
+    if first < 0:
+        return None
+    return (first * MFCC_HOP) / float(sr)
+
+
+@njit(cache=True, fastmath=True)
+def _first_hit(v1, win, step, min_sim):
+    """Index of the first row of 'win' (every 'step'-th) whose cosine
+    similarity with v1 reaches min_sim, or -1 if none does."""
+    v1_norm = 0.0
+    for i in range(v1.shape[0]):
+        v1_norm += v1[i] * v1[i]
+    v1_norm = np.sqrt(v1_norm)
+
+    for j in range(0, win.shape[0], step):
+        dot = 0.0
+        w_norm = 0.0
+        for i in range(v1.shape[0]):
+            dot += v1[i] * win[j, i]
+            w_norm += win[j, i] * win[j, i]
+        if dot >= min_sim * (v1_norm * np.sqrt(w_norm) + 1e-12):
+            return j
+    return -1
+
+
+def find_anchors_concurrently(a_an: np.ndarray,
+                              b_an: np.ndarray,
+                              sr: int,
+                              max_search: Optional[float],
+                              template_sec: float,
+                              hop_sec: float,
+                              min_sim: float,
+                              analysis_sr: int = XCORR_ANALYSIS_SR):
+    """
+    Run estimate_offset_multirate and find_content_anchor side by side; both
+    spend most of their time in numpy/scipy/numba code that releases the GIL.
+
+    Returns ((offset_sec, lags_sec, norm_corr), best_b).
+    """
+    with ThreadPoolExecutor(max_workers=2) as ex:
+        f_xc = ex.submit(estimate_offset_multirate, a_an, b_an, sr, max_search, analysis_sr)
+        f_ct = ex.submit(find_content_anchor, a_an, b_an, sr, template_sec, hop_sec, min_sim)
+        return f_xc.result(), f_ct.result()
+
 
-    hop = max(1, int(hop_sec * sr))
-    last_start = max(0, len(b_an) - tmpl_len)
+def _minmax_bins(y: np.ndarray, cols: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Per-bin (min, max) of 'y' split into at most 'cols' contiguous bins."""
+    if y.size == 0:
+        return np.zeros(0, dtype=y.dtype), np.zeros(0, dtype=y.dtype)
+    cols = max(1, min(cols, y.size))
+    starts = (np.arange(cols) * y.size) // cols
+    return np.minimum.reduceat(y, starts), np.maximum.reduceat(y, starts)
 
-    for start in range(0, last_start + 1, hop):
-        seg = b_an[start:start + tmpl_len]
-        seg_mfcc = librosa.feature.mfcc(y=seg, sr=sr, n_mfcc=20)
-        v2 = np.mean(seg_mfcc, axis=1)
-        sim = np.dot(v1, v2) / (np.linalg.norm(v1) * np.linalg.norm(v2) + 1e-12)
-        if sim >= min_sim:
-            return start / float(sr)
 
-    return None
+def _envelope(y: np.ndarray,
+              sr: int,
+              cols: int = 4000) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Time axis (bin centers, sec) and (min, max) envelope of 'y' over 'cols'
+    bins. Signals shorter than 2*cols are returned as-is, with ymin is ymax.
+    """
+    if y.size <= 2 * cols:
+        return np.arange(y.size) / float(sr), y, y
+    ymin, ymax = _minmax_bins(y, cols)
+    starts = (np.arange(cols) * y.size) // cols
+    ends = np.append(starts[1:], y.size)
+    return (starts + ends) / (2.0 * sr), ymin, ymax
+
+
+def _draw_envelope(img: Image.Image,
+                   ymin: np.ndarray,
+                   ymax: np.ndarray,
+                   lo: float,
+                   hi: float,
+                   color: Tuple[int, int, int],
+                   alpha: float = 1.0) -> None:
+    """
+    Fill column j of 'img' (RGB) between ymin[j] and ymax[j], with data
+    range [lo, hi] mapped to the full image height.
+    """
+    h = img.height
+    w = min(img.width, ymin.size)
+    if w == 0:
+        return
+    scale = (h - 1) / (hi - lo) if hi > lo else 0.0
+    top = np.clip(np.round((hi - ymax[:w]) * scale), 0, h - 1).astype(np.intp)
+    bot = np.clip(np.round((hi - ymin[:w]) * scale), 0, h - 1).astype(np.intp)
+    rows = np.arange(h)[:, None]
+    mask = (rows >= top[None, :]) & (rows <= bot[None, :])
+
+    # Let PIL alpha-blend the flat color through the column mask
+    coverage = mask.astype(np.uint8) * np.uint8(round(alpha * 255))
+    img.paste(color, (0, 0, w, h), Image.fromarray(coverage, mode="L"))
 
 
 def build_waveform_overlay_png(a: np.ndarray, b: np.ndarray, sr: int, out_png: str):
     """Save a dual waveform overlay for quick visual comparison."""
-    t_a = np.arange(len(a)) / float(sr)
-    t_b = np.arange(len(b)) / float(sr)
+    if USE_MPL:
+        _waveform_overlay_mpl(a, b, sr, out_png)
+        return
+
+    width, height = 1440, 480
+    n = max(a.size, b.size, 1)
+    img = Image.new("RGB", (width, height), (255, 255, 255))
+
+    # Both signals share one time axis, so the shorter one spans fewer columns
+    env_a = _minmax_bins(a, max(1, int(round(width * a.size / n))))
+    env_b = _minmax_bins(b, max(1, int(round(width * b.size / n))))
+    peak = max([float(np.max(np.abs(e))) for e in env_a + env_b if e.size] or [1.0]) or 1.0
+
+    ImageDraw.Draw(img).line([(0, height // 2), (width - 1, height // 2)], fill=(200, 200, 200))
+    _draw_envelope(img, *env_a, -peak, peak, (31, 119, 180), alpha=0.7)
+    _draw_envelope(img, *env_b, -peak, peak, (255, 127, 14), alpha=0.7)
+    img.save(out_png)
+
+
+def plot_similarity_curve(lags_sec: np.ndarray, corr_norm: np.ndarray, out_png: str):
+    """
+    Plot normalized similarity vs lag (seconds), lightly downsampled
+    for speed and memory safety.
+    """
+    if USE_MPL:
+        _similarity_curve_mpl(lags_sec, corr_norm, out_png)
+        return
+
+    width, height = 1200, 360
+    img = Image.new("RGB", (width, height), (255, 255, 255))
+    ymin, ymax = _minmax_bins(np.asarray(corr_norm, dtype=np.float32), width)
+    if ymin.size:
+        lo = min(float(ymin.min()), 0.0)
+        hi = max(float(ymax.max()), lo + 1e-6)
+        margin = 0.05 * (hi - lo)
+        lo, hi = lo - margin, hi + margin
+        zero_row = int(round((hi - 0.0) * (height - 1) / (hi - lo)))
+        ImageDraw.Draw(img).line([(0, zero_row), (width - 1, zero_row)], fill=(200, 200, 200))
+        _draw_envelope(img, ymin, ymax, lo, hi, (31, 119, 180))
+    img.save(out_png)
+
+
+def _waveform_overlay_mpl(a: np.ndarray, b: np.ndarray, sr: int, out_png: str):
+    """Matplotlib version of build_waveform_overlay_png (axes and legend)."""
     plt.figure(figsize=(12, 4))
-    plt.plot(t_a, a, alpha=0.7, label="in-house (raw)")
-    plt.plot(t_b, b, alpha=0.7, label="external (raw)")
+    for y, label, color in ((a, "in-house (raw)", "C0"), (b, "external (raw)", "C1")):
+        t, ymin, ymax = _envelope(y, sr)
+        if ymin is ymax:
+            plt.plot(t, y, alpha=0.7, color=color, label=label)
+        else:
+            plt.fill_between(t, ymin, ymax, alpha=0.7, color=color, label=label)
     plt.title("Waveform overlay (raw timelines)")
     plt.xlabel("Time (s)")
     plt.ylabel("Amplitude")
@@ -156,11 +512,8 @@ def build_waveform_overlay_png(a: np.ndarray, b: np.ndarray, sr: int, out_png: s
     plt.close()
 
 
-def plot_similarity_curve(lags_sec: np.ndarray, corr_norm: np.ndarray, out_png: str):
-    """
-    Plot normalized similarity vs lag (seconds), lightly downsampled
-    for speed and memory safety.
-    """
+def _similarity_curve_mpl(lags_sec: np.ndarray, corr_norm: np.ndarray, out_png: str):
+    """Matplotlib version of plot_similarity_curve (axes and labels)."""
     max_points = 200_000
     if lags_sec.size > max_points:
         step = int(np.ceil(lags_sec.size / float(max_points)))
@@ -183,6 +536,20 @@ def ffmpeg_time_format(seconds: float) -> str:
     return f"{max(0.0, seconds):.6f}"
 
 
+def _is_pcm16_mono_wav(path: str, sr: int) -> bool:
+    """True if 'path' is mono 16-bit PCM WAV at 'sr' (the alignment output format)."""
+    try:
+        info = sf.info(path)
+    except (sf.LibsndfileError, OSError):
+        return False
+    return (
+        info.format in ("WAV", "WAVEX", "RF64")
+        and info.subtype == "PCM_16"
+        and info.channels == 1
+        and info.samplerate == sr
+    )
+
+
 def build_align_command(
     inhouse_path: str,
     external_path: str,
@@ -243,6 +610,12 @@ def build_align_command(
             f'-af "adelay={pad_ms}|{pad_ms}" '
             f'-c:a pcm_s16le -rf64 always "{out_path}"'
         )
+    elif _is_pcm16_mono_wav(target, sr):
+        # No shift needed and already in the output format: remux only
+        cmd = (
+            f'ffmpeg -y -i "{target}" '
+            f'-c:a copy -rf64 always "{out_path}"'
+        )
     else:
         # No shift needed; just rewrap/normalize format
         cmd = (
@@ -328,6 +701,12 @@ def main():
         default=60.0,
         help="Max ±seconds to search around zero lag (xcorr path)",
     )
+    p.add_argument(
+        "--xcorr-sr",
+        type=int,
+        default=XCORR_ANALYSIS_SR,
+        help="Coarse xcorr sample rate (Hz), refined at --sr afterwards (0 = disable)",
+    )
     p.add_argument(
         "--ref-start-sec",
         type=float,
@@ -422,29 +801,31 @@ def main():
             print(f"[ERROR] File not found: {path}")
             sys.exit(2)
 
-    # Load raw audio (for overlays)
-    a_raw, sr = load_mono(args.inhouse, args.sr)
-    b_raw, sr = load_mono(args.external, args.sr)
+    # Load raw audio (for overlays) concurrently; the optional raw overlay
+    # then renders in the background while the analysis runs.
+    pool = ThreadPoolExecutor(max_workers=3)
+    fa = pool.submit(load_mono, args.inhouse, args.sr)
+    fb = pool.submit(load_mono, args.external, args.sr)
+    a_raw, sr = fa.result()
+    b_raw, _ = fb.result()
 
-    # Optional raw overlay (before alignment)
+    png_future = None
     if args.waveform_png:
-        try:
-            build_waveform_overlay_png(a_raw, b_raw, sr, args.waveform_png)
-            print(f"[INFO] Saved waveform overlay: {args.waveform_png}")
-        except Exception as e:
-            print(f"[WARN] Failed to build waveform overlay: {e}")
+        png_future = pool.submit(
+            build_waveform_overlay_png, a_raw, b_raw, sr, args.waveform_png
+        )
+    pool.shutdown(wait=False)
 
-    # Build analysis copies with start offsets and gating
-    a_an = a_raw.copy()
-    b_an = b_raw.copy()
+    # Build analysis windows with start offsets: slices are views of
+    # a_raw/b_raw, and apply_gate_db (below) returns a new array, so the raw
+    # signals are never copied or mutated.
+    a_an = a_raw
+    b_an = b_raw
     if args.ref_start_sec > 0:
         a_an = a_an[int(args.ref_start_sec * sr):]
     if args.search_start_sec > 0:
         b_an = b_an[int(args.search_start_sec * sr):]
 
-    a_an = apply_gate_db(a_an, args.threshold_db)
-    b_an = apply_gate_db(b_an, args.threshold_db)
-
     # Window the analysis to keep xcorr bounded and fast
     if args.analysis_sec and args.analysis_sec > 0:
         max_ref_samples = int(args.analysis_sec * sr)
@@ -460,6 +841,10 @@ def main():
     if b_an.size > needed_b_len:
         b_an = b_an[:needed_b_len]
 
+    # Gate only the windows that are analysed
+    a_an = apply_gate_db(a_an, args.threshold_db)
+    b_an = apply_gate_db(b_an, args.threshold_db)
+
     print(
         f"[INFO] Analysis sizes (samples): "
         f"in-house={a_an.size}, external={b_an.size}, sr={sr}"
@@ -470,8 +855,8 @@ def main():
     corr_norm = None
 
     if args.anchor_mode == "xcorr":
-        offset_sec, lags_sec, corr_norm = estimate_offset_seconds(
-            a_an, b_an, sr, args.max_search
+        offset_sec, lags_sec, corr_norm = estimate_offset_multirate(
+            a_an, b_an, sr, args.max_search, analysis_sr=args.xcorr_sr
         )
         offset_sec += (args.ref_start_sec - args.search_start_sec)
         print(
@@ -479,20 +864,21 @@ def main():
             f"(delay external to match in-house) = {offset_sec:.6f} s"
         )
     else:
-        best_b = find_content_anchor(
+        # xcorr runs alongside the content search, so the fallback is free
+        (xc_offset, lags_sec, corr_norm), best_b = find_anchors_concurrently(
             a_an,
             b_an,
             sr,
+            max_search=args.max_search,
             template_sec=args.template_sec,
             hop_sec=args.hop_sec,
             min_sim=args.min_sim,
+            analysis_sr=args.xcorr_sr,
         )
+        xc_offset += (args.ref_start_sec - args.search_start_sec)
         if best_b is None:
             print("[WARN] Content anchor not found at threshold; falling back to xcorr.")
-            offset_sec, lags_sec, corr_norm = estimate_offset_seconds(
-                a_an, b_an, sr, args.max_search
-            )
-            offset_sec += (args.ref_start_sec - args.search_start_sec)
+            offset_sec = xc_offset
             print(f"[INFO] Fallback XCORR => offset = {offset_sec:.6f} s")
         else:
             offset_sec = (
@@ -502,9 +888,18 @@ def main():
                 "[INFO] CONTENT anchor => offset "
                 f"(delay external to match in-house) = {offset_sec:.6f} s"
             )
-            # Minimal similarity trace so we can still emit a figure if asked
-            lags_sec = np.array([0.0, 1.0], dtype=float)
-            corr_norm = np.array([1.0, 1.0], dtype=float)
+            print(
+                f"[INFO] XCORR cross-check => offset = {xc_offset:.6f} s "
+                f"(peak similarity {float(np.max(corr_norm)):.3f})"
+            )
+
+    # Collect the raw overlay before any other plotting (pyplot is not thread-safe)
+    if png_future is not None:
+        try:
+            png_future.result()
+            print(f"[INFO] Saved waveform overlay: {args.waveform_png}")
+        except Exception as e:
+            print(f"[WARN] Failed to build waveform overlay: {e}")
 
     # Plot similarity if requested and we have arrays
     if args.similarity_png and (lags_sec is not None) and (corr_norm is not None):
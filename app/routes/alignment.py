@@ -1,10 +1,20 @@
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional
+import datetime as dt
+import os
 import uuid
 import json
+import shutil
+import threading
 
 from fastapi import APIRouter, UploadFile, File, Form, BackgroundTasks
 from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
 
 from app.models import AlignmentParameters, AlignmentJobResponse, AlignmentResultResponse
 from app.services.alignment_service import run_alignment_job
@@ -17,21 +27,83 @@ router = APIRouter(prefix="/api/v1/alignments", tags=["alignments"])
 JOBS_DIR = settings.MEDIA_ROOT / "jobs"
 JOBS_DIR.mkdir(parents=True, exist_ok=True)
 
+# Uploads are streamed to disk in blocks of this size
+UPLOAD_CHUNK_SIZE = 1 << 20
+
+# Live job state, keyed by job_id; the JSON files under JOBS_DIR are the
+# durable copy (written for every status except the transient ones).
+_JOBS: Dict[str, dict] = {}
+_JOBS_LOCK = threading.Lock()
+_TRANSIENT_STATUSES = {"running"}
+_TERMINAL_STATUSES = {"completed", "failed"}
+
+# One row of retention metadata per job, appended at creation, so that
+# purge_jobs.py can plan a sweep from one file instead of every job JSON.
+INDEX_PATH = JOBS_DIR / "_index.jsonl"
+_INDEX_LOCK = threading.Lock()
+
 
 def _job_path(job_id: str) -> Path:
     return JOBS_DIR / f"{job_id}.json"
 
 
+def _dumps(data: dict) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(data).encode("utf-8")
+
+
+def _loads(raw: bytes) -> dict:
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
 def _write_job(job_id: str, data: dict) -> None:
-    path = _job_path(job_id)
-    path.write_text(json.dumps(data), encoding="utf-8")
+    """Record job state in memory; persist it atomically unless transient.
+
+    Finished jobs are dropped from memory once on disk, so the in-process
+    map only holds jobs that are still queued or running. The file is
+    replaced before the memory entry is dropped, so a concurrent reader
+    never falls through to a stale file.
+    """
+    status = data.get("status")
+    if status not in _TRANSIENT_STATUSES:
+        path = _job_path(job_id)
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_bytes(_dumps(data))
+        os.replace(tmp, path)
+
+    with _JOBS_LOCK:
+        if status in _TERMINAL_STATUSES:
+            _JOBS.pop(job_id, None)
+        else:
+            _JOBS[job_id] = dict(data)
 
 
 def _read_job(job_id: str) -> Optional[dict]:
+    with _JOBS_LOCK:
+        data = _JOBS.get(job_id)
+    if data is not None:
+        return dict(data)
+
+    # Finished job, or one created before a restart
     path = _job_path(job_id)
     if not path.is_file():
         return None
-    return json.loads(path.read_text(encoding="utf-8"))
+    return _loads(path.read_bytes())
+
+
+def _append_index(job_id: str, retention: dict) -> None:
+    line = _dumps({"job_id": job_id, **retention}) + b"\n"
+    with _INDEX_LOCK, INDEX_PATH.open("ab") as f:
+        f.write(line)
+
+
+def _save_upload(upload: UploadFile, dest: Path) -> None:
+    """Copy an uploaded file to 'dest' in fixed-size blocks."""
+    with dest.open("wb") as f:
+        shutil.copyfileobj(upload.file, f, length=UPLOAD_CHUNK_SIZE)
 
 
 @router.post("", response_model=AlignmentJobResponse, status_code=202)
@@ -82,13 +154,19 @@ async def create_alignment_job(
     inhouse_path = tmp_dir / inhouse_file.filename
     external_path = tmp_dir / external_file.filename
 
-    # Persist uploaded files
-    with inhouse_path.open("wb") as f:
-        f.write(await inhouse_file.read())
-    with external_path.open("wb") as f:
-        f.write(await external_file.read())
+    # Persist uploaded files (streamed, off the event loop)
+    await run_in_threadpool(_save_upload, inhouse_file, inhouse_path)
+    await run_in_threadpool(_save_upload, external_file, external_path)
 
-    _write_job(job_id, {"status": "queued", "result": None})
+    # Retention fields read by purge_jobs.py; carried on every job write
+    retention = {
+        "created_at": dt.datetime.now(dt.timezone.utc).isoformat(),
+        "expires_at": None,
+        "has_raw_audio": True,
+        "pinned": False,
+    }
+    _write_job(job_id, {"status": "queued", "result": None, **retention})
+    _append_index(job_id, retention)
 
     def _run():
         job_data = _read_job(job_id) or {}
@@ -102,6 +180,7 @@ async def create_alignment_job(
                 job_id=job_id,
             )
             job_data = {
+                **retention,
                 "status": "completed",
                 "result": {
                     "job_id": result.job_id,
@@ -123,7 +202,7 @@ async def create_alignment_job(
             }
             _write_job(job_id, job_data)
         except Exception as exc:  # pragma: no cover - safety
-            job_data = {"status": "failed", "error": str(exc)}
+            job_data = {**retention, "status": "failed", "error": str(exc)}
             _write_job(job_id, job_data)
 
     background_tasks.add_task(_run)
@@ -1,16 +1,30 @@
+import asyncio
+import functools
+import os
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional, Tuple
 
 import numpy as np
 import librosa
+from scipy import sparse
+import soundfile as sf
 import librosa.display  # type: ignore
 import matplotlib
 
 matplotlib.use("Agg")
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+from PIL import Image
 
-from fastapi import APIRouter, HTTPException, Query
-from fastapi.responses import FileResponse
+try:
+  import numexpr
+except ImportError:  # pragma: no cover - numexpr is optional
+  numexpr = None
+
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import FileResponse, Response
 
 from app.config import settings
 from app.routes.alignment import _read_job
@@ -18,46 +32,207 @@ from app.routes.alignment import _read_job
 
 router = APIRouter(prefix="/api/v1/spectrograms", tags=["spectrograms"])
 
+# Process at most 5 minutes of raw audio for long/highRes views.
+MAX_LONG_SEC = 300.0
+
+# Spectrogram recomputes run here rather than on the event loop
+_POOL = ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix="spectrogram")
+# job_id -> asyncio.Semaphore(1); entries vanish once no request holds them
+_JOB_LOCKS = weakref.WeakValueDictionary()
+# Decorated renders reuse one Figure per (figsize, labels), outside pyplot's
+# global state; labels get their own Figure because tight_layout's subplot
+# params outlive clf(). Each Figure's lock serializes the threads using it.
+_FIGURES: Dict[Tuple[Tuple[int, int], bool], Tuple[Figure, threading.Lock]] = {}
+_FIGURES_LOCK = threading.Lock()
+
 
 def _job_results_dir(job_id: str) -> Path:
   return settings.MEDIA_ROOT / settings.RESULTS_DIR_NAME / job_id
 
 
-@router.get("/{job_id}")
-async def regenerate_spectrogram(
-  job_id: str,
-  track: str = Query("inhouse", pattern="^(inhouse|external|aligned)$"),
-  view: str = Query("default", pattern="^(default|long|highRes)$"),
-) -> FileResponse:
-  """Regenerate a spectrogram image for a job/track.
+def _png_response(request: Request, path: Path) -> Response:
+  """FileResponse for path, or a bodiless 304 if the client's copy is current.
 
-  default  -> use cached short-window STFT (first ~30s)
-  long     -> recompute from raw audio with a longer window (if available)
-  highRes  -> recompute from raw audio with higher time/freq resolution (if available)
+  The weak ETag is derived from mtime and size, so a re-rendered PNG
+  invalidates it without hashing the file.
   """
-
-  job = _read_job(job_id)
-  if not job:
-    raise HTTPException(status_code=404, detail="Job not found")
-
+  st = path.stat()
+  etag = f'W/"{st.st_mtime_ns:x}-{st.st_size:x}"'
+  headers = {"ETag": etag, "Cache-Control": "public, max-age=3600"}
+  if_none_match = request.headers.get("if-none-match", "")
+  if if_none_match.strip() == "*" or etag in (t.strip() for t in if_none_match.split(",")):
+    return Response(status_code=304, headers=headers)
+  return FileResponse(path, headers=headers)
+
+
+def _is_fresh(out_path: Path, source: Path) -> bool:
+  """True if out_path was rendered no earlier than source was last written."""
+  return out_path.is_file() and out_path.stat().st_mtime >= source.stat().st_mtime
+
+
+def _load_head_mono(audio_path: Path, max_sec: float) -> Tuple[np.ndarray, int]:
+  """Decode only the first max_sec seconds of audio_path, as mono float32."""
+  try:
+    with sf.SoundFile(str(audio_path)) as f:
+      sr = f.samplerate
+      y = f.read(frames=int(max_sec * sr), dtype="float32", always_2d=True)
+  except sf.LibsndfileError:
+    # Formats libsndfile cannot open (e.g. some compressed codecs)
+    y, sr = librosa.load(str(audio_path), sr=None, mono=True, duration=max_sec)
+    return y, int(sr)
+  y = y.mean(axis=1) if y.shape[1] > 1 else y[:, 0]
+  return y, sr
+
+
+def _figure_for(figsize: Tuple[int, int], labels: bool) -> Tuple[Figure, threading.Lock]:
+  key = (figsize, labels)
+  with _FIGURES_LOCK:
+    entry = _FIGURES.get(key)
+    if entry is None:
+      entry = _FIGURES[key] = (Figure(figsize=figsize), threading.Lock())
+  return entry
+
+
+def _stft_magnitude(y: np.ndarray, n_fft: int, hop_length: int) -> np.ndarray:
+  """|STFT(y)| as float32, via a complex64 transform that is freed on return."""
+  y = np.ascontiguousarray(y, dtype=np.float32)
+  return np.abs(librosa.stft(y, n_fft=n_fft, hop_length=hop_length, dtype=np.complex64))
+
+
+def _amplitude_to_db(S: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+  """librosa.amplitude_to_db(S, ref=np.max) (amin=1e-5, top_db=80) for S >= 0.
+
+  With ref at the peak, the top_db clamp is a floor of max(amin, ref*1e-4)
+  on S before the log, so the conversion is a single fused numexpr pass
+  (or in-place numpy passes without it). 'out' may be S itself.
+  """
+  ref = float(S.max())
+  # Not "floor": numexpr resolves its own floor() ahead of caller locals.
+  s_floor = np.float32(max(1e-5, ref * 1e-4))
+  ref_db = np.float32(20.0 * np.log10(max(1e-5, ref)))
+  if out is None:
+    out = np.empty_like(S)
+  if numexpr is not None:
+    return numexpr.evaluate(
+      "20 * log10(where(S > s_floor, S, s_floor)) - ref_db",
+      local_dict={"S": S, "s_floor": s_floor, "ref_db": ref_db},
+      out=out,
+      casting="same_kind",
+    )
+  np.maximum(S, s_floor, out=out)
+  np.log10(out, out=out)
+  out *= 20.0
+  out -= ref_db
+  return out
+
+
+@functools.lru_cache(maxsize=8)
+def _log_freq_matrix(sr: int, n_bins: int, height: int) -> sparse.csr_matrix:
+  """(height, n_bins) matrix resampling STFT bins onto log-spaced rows.
+
+  Row r linearly interpolates the two bins around the r-th of 'height'
+  log-spaced frequencies between ~20 Hz and Nyquist (lowest first).
+  """
+  nyquist = sr / 2.0
+  target = np.geomspace(min(20.0, nyquist / 10.0), nyquist, height)
+  pos = target * (n_bins - 1) / nyquist
+  lo = np.minimum(np.floor(pos).astype(np.intp), n_bins - 2)
+  frac = (pos - lo).astype(np.float32)
+  rows = np.repeat(np.arange(height), 2)
+  cols = np.stack([lo, lo + 1], axis=1).ravel()
+  vals = np.stack([1.0 - frac, frac], axis=1).ravel()
+  return sparse.csr_matrix((vals, (rows, cols)), shape=(height, n_bins))
+
+
+def _render_spec_png(S_db: np.ndarray, sr: int, out_path: Path, figsize: Tuple[int, int], dpi: int) -> None:
+  """Write S_db (freq x time, dB) as a bare magma image, skipping matplotlib rendering.
+
+  Frequencies are put on a log axis (as specshow's y_axis="log" does) by
+  one sparse product with a cached resample matrix.
+  """
+  width, height = int(figsize[0] * dpi), int(figsize[1] * dpi)
+  S_log = _log_freq_matrix(sr, S_db.shape[0], height) @ S_db
+  lo = float(S_log.min())
+  hi = float(S_log.max())
+  norm = np.clip((S_log - lo) / (hi - lo + 1e-9), 0.0, 1.0)
+  # Colormap as a LUT; flip so low frequencies end up at the bottom
+  rgb = matplotlib.colormaps["magma"](norm[::-1], bytes=True)[..., :3]
+  Image.fromarray(rgb).resize((width, height), Image.Resampling.BILINEAR).save(str(out_path), format="PNG")
+
+
+def _render_spec_mpl(
+  S_db: np.ndarray,
+  sr: int,
+  hop_length: int,
+  out_path: Path,
+  figsize: Tuple[int, int],
+  dpi: int,
+  title: str,
+  labels: bool,
+) -> None:
+  """Write S_db with matplotlib axes; title/colorbar/tight_layout only with labels."""
+  fig, lock = _figure_for(figsize, labels)
+  with lock:
+    fig.clf()
+    ax = fig.add_subplot(111)
+    img = librosa.display.specshow(
+      S_db,
+      sr=sr,
+      hop_length=hop_length,
+      x_axis="time",
+      y_axis="log",
+      cmap="magma",
+      ax=ax,
+    )
+    if labels:
+      ax.set_title(title)
+      fig.colorbar(img, ax=ax, format="%+2.0f dB")
+      fig.tight_layout()
+    fig.savefig(str(out_path), dpi=dpi, format="png")
+
+
+def _save_spectrogram_png(
+  S_db: np.ndarray,
+  sr: int,
+  hop_length: int,
+  out_path: Path,
+  figsize: Tuple[int, int],
+  dpi: int,
+  title: str,
+  decorated: bool,
+  labels: bool = False,
+) -> None:
+  """Save a spectrogram PNG.
+
+  Axes are drawn via matplotlib only when decorated (or labels) is set;
+  title, colorbar and tight_layout only when labels is set.
+  """
+  # Render beside the target and swap it in, so a failed or interrupted
+  # write never leaves a truncated PNG that _is_fresh would keep serving.
+  # Renders of one job are serialized in-process; the pid covers workers.
+  tmp = out_path.with_name(f"{out_path.name}.{os.getpid()}.tmp")
+  try:
+    if decorated or labels:
+      _render_spec_mpl(S_db, sr, hop_length, tmp, figsize, dpi, title, labels)
+    else:
+      _render_spec_png(S_db, sr, tmp, figsize, dpi)
+    os.replace(tmp, out_path)
+  finally:
+    tmp.unlink(missing_ok=True)
+
+
+def _compute_spectrogram_sync(
+  job_id: str,
+  job: dict,
+  track: str,
+  view: str,
+  stft_path: Path,
+  decorated: bool,
+  labels: bool,
+) -> Path:
+  """Render (or reuse) the PNG for a non-default request; runs on _POOL."""
   results_dir = _job_results_dir(job_id)
 
-  # Map track to cached STFT/PNG names
-  stft_map = {
-    "inhouse": (results_dir / "stft_inhouse.npz", results_dir / "spectrogram_inhouse.png"),
-    "external": (results_dir / "stft_external.npz", results_dir / "spectrogram_external.png"),
-    "aligned": (results_dir / "stft_aligned.npz", results_dir / "spectrogram_aligned.png"),
-  }
-
-  if track not in stft_map:
-    raise HTTPException(status_code=400, detail="Invalid track")
-
-  stft_path, default_png = stft_map[track]
-
-  # If we only need default view and the PNG exists, return it directly.
-  if view == "default" and default_png.is_file():
-    return FileResponse(default_png)
-
   # For long/highRes we try to recompute from raw audio if available.
   has_raw_audio = bool(job.get("has_raw_audio", True))
 
@@ -82,29 +257,29 @@ async def regenerate_spectrogram(
   # STFT exists, just re-plot that STFT with adjusted figure size.
   use_cached_stft_only = not has_raw_audio or audio_path is None
 
+  # Rendered PNGs are memoized next to the results; the name keeps the
+  # variants apart and each is reused while newer than its source file.
+  variant = "_labels" if labels else "_decorated" if decorated else ""
+
   if view in ("long", "highRes") and not use_cached_stft_only and audio_path is not None:
     # Recompute STFT from raw audio on demand, but cap duration to avoid huge STFTs
     # on very long files that can exhaust memory or stall the worker.
+    out_path = results_dir / f"spectrogram_{track}_{view}{variant}.png"
     try:
-      y, sr = librosa.load(str(audio_path), sr=None, mono=True)
+      if _is_fresh(out_path, audio_path):
+        return out_path
 
-      # Process at most 5 minutes for long/highRes views.
-      MAX_LONG_SEC = 300.0
+      y, sr = _load_head_mono(audio_path, MAX_LONG_SEC)
 
       if view == "long":
-        max_sec = MAX_LONG_SEC
         n_fft = 2048
         hop_length = 512
       else:  # highRes
-        max_sec = MAX_LONG_SEC
         n_fft = 4096
         hop_length = 256
 
-      if max_sec is not None:
-        y = y[: int(max_sec * sr)]
-
-      S = np.abs(librosa.stft(y, n_fft=n_fft, hop_length=hop_length))
-      S_db = librosa.amplitude_to_db(S, ref=np.max)
+      S = _stft_magnitude(y, n_fft, hop_length)
+      S_db = _amplitude_to_db(S, out=S)
 
       if view == "long":
         figsize = (10, 3)
@@ -113,22 +288,11 @@ async def regenerate_spectrogram(
         figsize = (12, 4)
         dpi = 160
 
-      out_path = results_dir / f"spectrogram_{track}_{view}.png"
-      plt.figure(figsize=figsize)
-      librosa.display.specshow(
-        S_db,
-        sr=sr,
-        hop_length=hop_length,
-        x_axis="time",
-        y_axis="log",
-        cmap="magma",
+      _save_spectrogram_png(
+        S_db, sr, hop_length, out_path, figsize, dpi,
+        title=f"Spectrogram ({track}, {view})", decorated=decorated, labels=labels,
       )
-      plt.title(f"Spectrogram ({track}, {view})")
-      plt.colorbar(format="%+2.0f dB")
-      plt.tight_layout()
-      plt.savefig(str(out_path), dpi=dpi)
-      plt.close()
-      return FileResponse(out_path)
+      return out_path
     except Exception:
       # If recompute fails, fall back to cached STFT if available.
       pass
@@ -136,11 +300,25 @@ async def regenerate_spectrogram(
   if not stft_path.is_file():
     raise HTTPException(status_code=404, detail="No cached STFT for this job/track")
 
-  # Re-plot from cached STFT as a fallback (still short-window)
-  data = np.load(stft_path)
-  S_mag = data["S_mag"]
-  sr = int(data["sr"])
-  hop_length = int(data["hop_length"])
+  out_path = results_dir / f"spectrogram_{track}_{view}_stft{variant}.png"
+  if _is_fresh(out_path, stft_path):
+    return out_path
+
+  # Re-plot from cached STFT as a fallback (still short-window). An
+  # uncompressed stft_<track>.npy beside the .npz is memory-mapped rather
+  # than inflating S_mag again; the .npz still supplies sr and hop_length.
+  npy_path = stft_path.with_suffix(".npy")
+  with np.load(stft_path) as data:
+    sr = int(data["sr"])
+    hop_length = int(data["hop_length"])
+    S_mag = np.load(npy_path, mmap_mode="r") if npy_path.is_file() else data["S_mag"]
+    if "layout" in data.files and str(data["layout"]) == "time_freq":
+      # Stored as (frames, bins); the transpose is a zero-copy view
+      S_mag = S_mag.T
+  # Older caches may hold float64; dB conversion is memory-bound, so work in float32.
+  # Float32 data passes through uncopied (a memmap, or a transposed view: the
+  # dB conversion is elementwise, so memory order doesn't matter).
+  S_mag = np.asarray(S_mag, dtype=np.float32)
 
   if view == "long":
     figsize = (10, 3)
@@ -152,22 +330,67 @@ async def regenerate_spectrogram(
     figsize = (8, 3)
     dpi = 120
 
-  S_db = librosa.amplitude_to_db(S_mag, ref=np.max)
-
-  out_path = results_dir / f"spectrogram_{track}_{view}.png"
-  plt.figure(figsize=figsize)
-  librosa.display.specshow(
-    S_db,
-    sr=sr,
-    hop_length=hop_length,
-    x_axis="time",
-    y_axis="log",
-    cmap="magma",
+  # Overwrite S_mag unless it is the read-only memmap
+  S_db = _amplitude_to_db(S_mag, out=S_mag if S_mag.flags.writeable else None)
+
+  _save_spectrogram_png(
+    S_db, sr, hop_length, out_path, figsize, dpi,
+    title=f"Spectrogram ({track}, {view})", decorated=decorated, labels=labels,
   )
-  plt.title(f"Spectrogram ({track}, {view})")
-  plt.colorbar(format="%+2.0f dB")
-  plt.tight_layout()
-  plt.savefig(str(out_path), dpi=dpi)
-  plt.close()
 
-  return FileResponse(out_path)
+  return out_path
+
+
+@router.get("/{job_id}")
+async def regenerate_spectrogram(
+  request: Request,
+  job_id: str,
+  track: str = Query("inhouse", pattern="^(inhouse|external|aligned)$"),
+  view: str = Query("default", pattern="^(default|long|highRes)$"),
+  decorated: bool = Query(False),
+  labels: bool = Query(False),
+) -> Response:
+  """Regenerate a spectrogram image for a job/track.
+
+  default  -> use cached short-window STFT (first ~30s)
+  long     -> recompute from raw audio with a longer window (if available)
+  highRes  -> recompute from raw audio with higher time/freq resolution (if available)
+
+  Images are bare colormapped spectrograms unless decorated=true, which
+  adds axes (slower, rendered with matplotlib); labels=true also adds the
+  title and colorbar.
+  Responses carry a weak ETag; a matching If-None-Match gets a 304.
+  """
+
+  job = _read_job(job_id)
+  if not job:
+    raise HTTPException(status_code=404, detail="Job not found")
+
+  results_dir = _job_results_dir(job_id)
+
+  # Map track to cached STFT/PNG names
+  stft_map = {
+    "inhouse": (results_dir / "stft_inhouse.npz", results_dir / "spectrogram_inhouse.png"),
+    "external": (results_dir / "stft_external.npz", results_dir / "spectrogram_external.png"),
+    "aligned": (results_dir / "stft_aligned.npz", results_dir / "spectrogram_aligned.png"),
+  }
+
+  if track not in stft_map:
+    raise HTTPException(status_code=400, detail="Invalid track")
+
+  stft_path, default_png = stft_map[track]
+
+  # If we only need default view and the PNG exists, return it directly.
+  if view == "default" and default_png.is_file():
+    return _png_response(request, default_png)
+
+  # Loading, STFT and rendering block for seconds; keep them off the event
+  # loop and run at most one per job so concurrent hits share the result.
+  sem = _JOB_LOCKS.get(job_id)
+  if sem is None:
+    sem = _JOB_LOCKS[job_id] = asyncio.Semaphore(1)
+  async with sem:
+    out_path = await asyncio.get_running_loop().run_in_executor(
+      _POOL, _compute_spectrogram_sync, job_id, job, track, view, stft_path, decorated, labels,
+    )
+  return _png_response(request, out_path)
@@ -1,6 +1,10 @@
+import hashlib
+import json
 import logging
 import os
+import shutil
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Optional, List, Tuple
 
@@ -13,8 +17,8 @@ from app.models import AlignmentParameters
 from align_first_anchor import (
     load_mono,
     apply_gate_db,
-    estimate_offset_seconds,
-    find_content_anchor,
+    estimate_offset_multirate,
+    find_anchors_concurrently,
     build_waveform_overlay_png,
     plot_similarity_curve,
     build_align_command,
@@ -57,6 +61,36 @@ def _ensure_dirs(job_id: str) -> Tuple[Path, Path]:
     return uploads, results
 
 
+def _link_or_copy(src: Path, dst: Path) -> None:
+    """Hardlink src to dst when possible, else stream-copy it."""
+    try:
+        os.link(src, dst)
+    except OSError:
+        # Cross-device, unsupported filesystem, or dst already present
+        shutil.copyfile(src, dst)
+
+
+def _write_file_meta(path: Path) -> Path:
+    """Record the size and SHA-256 of 'path' in '<path>.meta' (JSON).
+
+    Lets whoever serves the file set Content-Length and a strong ETag
+    without re-reading it.
+    """
+    with path.open("rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if hasattr(hashlib, "file_digest"):  # Python 3.11+
+            digest = hashlib.file_digest(f, "sha256").hexdigest()
+        else:
+            h = hashlib.sha256()
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+            digest = h.hexdigest()
+
+    meta_path = path.with_name(path.name + ".meta")
+    meta_path.write_text(json.dumps({"size": size, "sha256": digest}), encoding="utf-8")
+    return meta_path
+
+
 def run_alignment_job(
     inhouse_src: Path,
     external_src: Path,
@@ -85,35 +119,37 @@ def run_alignment_job(
     external_path.parent.mkdir(parents=True, exist_ok=True)
 
     if inhouse_src != inhouse_path:
-        inhouse_path.write_bytes(inhouse_src.read_bytes())
+        _link_or_copy(inhouse_src, inhouse_path)
     if external_src != external_path:
-        external_path.write_bytes(external_src.read_bytes())
+        _link_or_copy(external_src, external_path)
 
-    # Load raw audio
-    a_raw, sr = load_mono(str(inhouse_path), params.sr)
-    b_raw, sr = load_mono(str(external_path), params.sr)
+    # Load raw audio concurrently; the optional raw overlay then renders in
+    # the background while the analysis runs.
+    pool = ThreadPoolExecutor(max_workers=3)
+    fa = pool.submit(load_mono, str(inhouse_path), params.sr)
+    fb = pool.submit(load_mono, str(external_path), params.sr)
+    a_raw, sr = fa.result()
+    b_raw, _ = fb.result()
 
-    # Optional raw overlay
     waveform_png_path: Optional[Path] = None
+    png_future = None
     if params.generate_waveform_png:
         waveform_png_path = results_dir / "waveform_overlay.png"
-        try:
-            build_waveform_overlay_png(a_raw, b_raw, sr, str(waveform_png_path))
-            log(f"Saved waveform overlay: {waveform_png_path}")
-        except Exception as e:  # pragma: no cover - visualization failure
-            log(f"[WARN] Failed to build waveform overlay: {e}")
+        png_future = pool.submit(
+            build_waveform_overlay_png, a_raw, b_raw, sr, str(waveform_png_path)
+        )
+    pool.shutdown(wait=False)
 
-    # Build analysis copies with start offsets and gating
-    a_an = a_raw.copy()
-    b_an = b_raw.copy()
+    # Build analysis windows with start offsets: slices are views of
+    # a_raw/b_raw, and apply_gate_db (below) returns a new array, so the raw
+    # signals are never copied or mutated.
+    a_an = a_raw
+    b_an = b_raw
     if params.ref_start_sec > 0:
         a_an = a_an[int(params.ref_start_sec * sr) :]
     if params.search_start_sec > 0:
         b_an = b_an[int(params.search_start_sec * sr) :]
 
-    a_an = apply_gate_db(a_an, params.threshold_db)
-    b_an = apply_gate_db(b_an, params.threshold_db)
-
     # Window the analysis
     if params.analysis_sec and params.analysis_sec > 0:
         max_ref_samples = int(params.analysis_sec * sr)
@@ -129,6 +165,10 @@ def run_alignment_job(
     if b_an.size > needed_b_len:
         b_an = b_an[:needed_b_len]
 
+    # Gate only the windows that are analysed
+    a_an = apply_gate_db(a_an, params.threshold_db)
+    b_an = apply_gate_db(b_an, params.threshold_db)
+
     log(
         f"Analysis sizes (samples): in-house={a_an.size}, external={b_an.size}, sr={sr}"
     )
@@ -137,7 +177,7 @@ def run_alignment_job(
     lags_sec = None
     corr_norm = None
     if params.anchor_mode == "xcorr":
-        offset_sec, lags_sec, corr_norm = estimate_offset_seconds(
+        offset_sec, lags_sec, corr_norm = estimate_offset_multirate(
             a_an, b_an, sr, params.max_search
         )
         offset_sec += (params.ref_start_sec - params.search_start_sec)
@@ -145,20 +185,20 @@ def run_alignment_job(
             f"XCORR anchor => offset (delay external to match in-house) = {offset_sec:.6f} s"
         )
     else:
-        best_b = find_content_anchor(
+        # xcorr runs alongside the content search, so the fallback is free
+        (xc_offset, lags_sec, corr_norm), best_b = find_anchors_concurrently(
             a_an,
             b_an,
             sr,
+            max_search=params.max_search,
             template_sec=params.template_sec,
             hop_sec=params.hop_sec,
             min_sim=params.min_sim,
         )
+        xc_offset += (params.ref_start_sec - params.search_start_sec)
         if best_b is None:
             log("[WARN] Content anchor not found at threshold; falling back to xcorr.")
-            offset_sec, lags_sec, corr_norm = estimate_offset_seconds(
-                a_an, b_an, sr, params.max_search
-            )
-            offset_sec += (params.ref_start_sec - params.search_start_sec)
+            offset_sec = xc_offset
             log(f"Fallback XCORR => offset = {offset_sec:.6f} s")
         else:
             offset_sec = (
@@ -168,9 +208,18 @@ def run_alignment_job(
                 "CONTENT anchor => offset (delay external to match in-house) "
                 f"= {offset_sec:.6f} s"
             )
-            # Minimal similarity trace so we can still emit a figure if asked
-            lags_sec = np.array([0.0, 1.0], dtype=float)
-            corr_norm = np.array([1.0, 1.0], dtype=float)
+            log(
+                f"XCORR cross-check => offset = {xc_offset:.6f} s "
+                f"(peak similarity {float(np.max(corr_norm)):.3f})"
+            )
+
+    # Collect the raw overlay before any other plotting (pyplot is not thread-safe)
+    if png_future is not None:
+        try:
+            png_future.result()
+            log(f"Saved waveform overlay: {waveform_png_path}")
+        except Exception as e:  # pragma: no cover - visualization failure
+            log(f"[WARN] Failed to build waveform overlay: {e}")
 
     # Similarity plot
     similarity_png_path: Optional[Path] = None
@@ -213,6 +262,10 @@ def run_alignment_job(
         else:
             aligned_audio_path = out_audio_path
             log("Alignment applied successfully.")
+            try:
+                _write_file_meta(out_audio_path)
+            except OSError as e:  # pragma: no cover - output vanished
+                log(f"[WARN] Failed to write {out_audio_path.name}.meta: {e}")
 
     return AlignmentResult(
         job_id=job_id,
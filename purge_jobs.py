@@ -33,18 +33,29 @@ import argparse
 import datetime as dt
 import json
 import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Any, Dict, Tuple
+from typing import Any, Dict, Set, Tuple
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
 
 # Defaults can be overridden via environment variables
 JOB_RETENTION_DAYS = int(os.environ.get("ALIGN_JOB_RETENTION_DAYS", "90"))
 RAW_AUDIO_ONLY_DAYS = int(os.environ.get("ALIGN_RAW_AUDIO_ONLY_DAYS", "30"))
+PURGE_WORKERS = int(os.environ.get("ALIGN_PURGE_WORKERS", "8"))
 
 MEDIA_ROOT = Path(os.environ.get("ALIGN_MEDIA_ROOT", "data"))
 JOBS_DIR = MEDIA_ROOT / "jobs"
 UPLOADS_DIR = MEDIA_ROOT / "uploads"
 RESULTS_DIR = MEDIA_ROOT / "results"
 
+# Retention metadata appended by the API at job creation (one JSON row per job)
+INDEX_NAME = "_index.jsonl"
+
 
 def parse_iso(ts: str | None) -> dt.datetime | None:
     if not ts:
@@ -55,10 +66,47 @@ def parse_iso(ts: str | None) -> dt.datetime | None:
         return None
 
 
+def _loads(raw: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def load_index() -> Dict[str, Dict[str, Any]] | None:
+    """Parse jobs/_index.jsonl into {job_id: row}; None if there is no index."""
+    try:
+        raw = (JOBS_DIR / INDEX_NAME).read_bytes()
+    except FileNotFoundError:
+        return None
+
+    rows: Dict[str, Dict[str, Any]] = {}
+    for line in raw.splitlines():
+        try:
+            row = _loads(line)
+        except ValueError:
+            # Blank or torn line (e.g. a crash mid-append)
+            continue
+        if isinstance(row, dict) and row.get("job_id"):
+            rows[row["job_id"]] = row
+    return rows
+
+
+def rewrite_index(drop: Set[str]) -> None:
+    """Atomically rewrite the index without the rows for job ids in 'drop'."""
+    # Re-read right before replacing, to keep rows appended during the sweep
+    rows = load_index()
+    if not rows or not drop.intersection(rows):
+        return
+    path = JOBS_DIR / INDEX_NAME
+    tmp = path.with_name(path.name + ".tmp")
+    kept = (json.dumps(row).encode("utf-8") + b"\n" for job_id, row in rows.items() if job_id not in drop)
+    tmp.write_bytes(b"".join(kept))
+    os.replace(tmp, path)
+
+
 def load_job(job_path: Path) -> Dict[str, Any] | None:
     try:
-        with job_path.open("r", encoding="utf-8") as f:
-            return json.load(f)
+        return _loads(job_path.read_bytes())
     except Exception:
         return None
 
@@ -75,22 +123,19 @@ def purge_job(job_id: str, dry_run: bool = False) -> Tuple[int, int, int]:
     uploads = UPLOADS_DIR / job_id
     results = RESULTS_DIR / job_id
 
-    if not dry_run:
-        if job_json.is_file():
-            job_json.unlink()
-            jobs_deleted = 1
-        if uploads.is_dir():
-            for p in uploads.rglob("*"):
-                if p.is_file():
-                    p.unlink()
-            uploads.rmdir()
-            uploads_deleted = 1
-        if results.is_dir():
-            for p in results.rglob("*"):
-                if p.is_file():
-                    p.unlink()
-            results.rmdir()
-            results_deleted = 1
+    if dry_run:
+        # Report what would be removed
+        return int(job_json.is_file()), int(uploads.is_dir()), int(results.is_dir())
+
+    if job_json.is_file():
+        job_json.unlink()
+        jobs_deleted = 1
+    if uploads.is_dir():
+        shutil.rmtree(uploads, ignore_errors=True)
+        uploads_deleted = int(not uploads.exists())
+    if results.is_dir():
+        shutil.rmtree(results, ignore_errors=True)
+        results_deleted = int(not results.exists())
 
     return jobs_deleted, uploads_deleted, results_deleted
 
@@ -105,12 +150,66 @@ def purge_raw_audio(job_id: str, dry_run: bool = False) -> int:
     if not uploads.is_dir():
         return 0
 
-    if not dry_run:
-        for p in uploads.rglob("*"):
-            if p.is_file():
-                p.unlink()
-        uploads.rmdir()
-    return 1
+    if dry_run:
+        return 1
+
+    shutil.rmtree(uploads, ignore_errors=True)
+    return int(not uploads.exists())
+
+
+def retention_action(job: Dict[str, Any], job_cutoff: dt.datetime, raw_cutoff: dt.datetime) -> str | None:
+    """Return "job", "raw" or None for a job (or index row) under the policy."""
+
+    created_at = parse_iso(job.get("created_at"))
+    expires_at = parse_iso(job.get("expires_at"))
+    has_raw_audio = bool(job.get("has_raw_audio", True))
+    pinned = bool(job.get("pinned", False))
+
+    # Skip pinned jobs completely
+    if pinned:
+        return None
+
+    # Decide if the whole job should be purged
+    if created_at and created_at < job_cutoff:
+        return "job"
+
+    # Otherwise, consider raw-audio-only purge
+    if has_raw_audio:
+        # Prefer explicit expires_at if present; else derive from created_at
+        raw_deadline = expires_at or (created_at + dt.timedelta(days=RAW_AUDIO_ONLY_DAYS) if created_at else None)
+        if raw_deadline and raw_deadline < raw_cutoff:
+            return "raw"
+
+    return None
+
+
+def process_job(
+    job_id: str,
+    job_json: Path,
+    job_cutoff: dt.datetime,
+    raw_cutoff: dt.datetime,
+    dry_run: bool = False,
+    row: Dict[str, Any] | None = None,
+) -> Tuple[str | None, Tuple[int, int, int]]:
+    """Apply the retention policy to one job.
+
+    Fields missing from the job JSON are taken from its index row, if any.
+    Returns (action, (jobs_deleted, uploads_deleted, results_deleted)) where
+    action is "job" (whole job purged), "raw" (raw uploads only) or None.
+    """
+
+    job = load_job(job_json)
+    if job is None:
+        return None, (0, 0, 0)
+    if row:
+        job = {**row, **job}
+
+    action = retention_action(job, job_cutoff, raw_cutoff)
+    if action == "job":
+        return action, purge_job(job_id, dry_run=dry_run)
+    if action == "raw":
+        return action, (0, purge_raw_audio(job_id, dry_run=dry_run), 0)
+    return None, (0, 0, 0)
 
 
 def main() -> None:
@@ -120,7 +219,8 @@ def main() -> None:
 
     now = dt.datetime.now(dt.timezone.utc)
     job_cutoff = now - dt.timedelta(days=JOB_RETENTION_DAYS)
-    raw_cutoff = now - dt.timedelta(days=RAW_AUDIO_ONLY_DAYS)
+    # Raw deadlines already include RAW_AUDIO_ONLY_DAYS; they are due once past.
+    raw_cutoff = now
 
     total_jobs_deleted = total_uploads_deleted = total_results_deleted = 0
     total_raw_only_deleted = 0
@@ -129,39 +229,42 @@ def main() -> None:
         print(f"No jobs directory found at {JOBS_DIR}")
         return
 
-    for job_json in JOBS_DIR.glob("*.json"):
-        job_id = job_json.stem
-        job = load_job(job_json)
-        if not job:
-            continue
-
-        created_at = parse_iso(job.get("created_at"))
-        expires_at = parse_iso(job.get("expires_at"))
-        has_raw_audio = bool(job.get("has_raw_audio", True))
-        pinned = bool(job.get("pinned", False))
-
-        # Skip pinned jobs completely
-        if pinned:
-            continue
-
-        # Decide if the whole job should be purged
-        if created_at and created_at < job_cutoff:
-            j, u, r = purge_job(job_id, dry_run=args.dry_run)
-            total_jobs_deleted += j
-            total_uploads_deleted += u
-            total_results_deleted += r
-            print(f"[JOB] Purged job {job_id} (older than {JOB_RETENTION_DAYS} days)")
-            continue
-
-        # Otherwise, consider raw-audio-only purge
-        if has_raw_audio:
-            # Prefer explicit expires_at if present; else derive from created_at
-            raw_deadline = expires_at or (created_at + dt.timedelta(days=RAW_AUDIO_ONLY_DAYS) if created_at else None)
-            if raw_deadline and raw_deadline < raw_cutoff:
-                removed = purge_raw_audio(job_id, dry_run=args.dry_run)
-                if removed:
-                    total_raw_only_deleted += 1
-                    print(f"[RAW] Purged raw uploads for {job_id}")
+    with os.scandir(JOBS_DIR) as it:
+        on_disk = {e.name[:-5]: Path(e.path) for e in it if e.name.endswith(".json")}
+
+    # The index pre-screens jobs without opening their JSON. A job JSON is
+    # only read when its row says it may be due, or when it has no usable
+    # row (e.g. jobs created before the index existed).
+    index = load_index() or {}
+    candidates = []
+    for job_id, job_json in on_disk.items():
+        row = index.get(job_id)
+        if row is None or not row.get("created_at") or retention_action(row, job_cutoff, raw_cutoff):
+            candidates.append((job_id, job_json, row))
+
+    def _process(candidate: Tuple[str, Path, Dict[str, Any] | None]) -> Tuple[str, str | None, Tuple[int, int, int]]:
+        job_id, job_json, row = candidate
+        return (job_id, *process_job(job_id, job_json, job_cutoff, raw_cutoff, dry_run=args.dry_run, row=row))
+
+    purged: Set[str] = set()
+
+    # Deletions are I/O bound, so a thread pool overlaps them; results come
+    # back in scan order and are reported from this thread.
+    with ThreadPoolExecutor(max_workers=PURGE_WORKERS) as ex:
+        for job_id, action, (j, u, r) in ex.map(_process, candidates):
+            if action == "job":
+                total_jobs_deleted += j
+                total_uploads_deleted += u
+                total_results_deleted += r
+                purged.add(job_id)
+                print(f"[JOB] Purged job {job_id} (older than {JOB_RETENTION_DAYS} days)")
+            elif action == "raw" and u:
+                total_raw_only_deleted += 1
+                print(f"[RAW] Purged raw uploads for {job_id}")
+
+    if not args.dry_run:
+        # Drop rows for purged jobs and for jobs whose JSON is already gone
+        rewrite_index(purged | (index.keys() - on_disk.keys()))
 
     print("---")
     print(f"Jobs deleted:       {total_jobs_deleted}")
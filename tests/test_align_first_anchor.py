@@ -0,0 +1,127 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+import scipy.signal as spsig
+import soundfile as sf
+
+from align_first_anchor import (
+    apply_gate_db,
+    build_align_command,
+    estimate_offset_multirate,
+    estimate_offset_seconds,
+    find_content_anchor,
+)
+
+
+def _noise_after_tone(sr: int, lead_sec: float, seconds: float):
+    rng = np.random.default_rng(0)
+    a = (0.3 * rng.standard_normal(int(sr * seconds))).astype(np.float32)
+    t = np.arange(int(sr * lead_sec)) / float(sr)
+    lead = (0.3 * np.sin(2 * np.pi * 220.0 * t)).astype(np.float32)
+    return a, lead, np.concatenate([lead, a])
+
+
+def test_gate_zeroes_quiet_samples_without_touching_input():
+    y = np.array([0.5, -0.001, 0.02, -0.3, 0.0005], dtype=np.float32)
+    raw = y.copy()
+    gated = apply_gate_db(y[1:], threshold_db=-40.0)
+    np.testing.assert_array_equal(gated, np.array([0.0, 0.02, -0.3, 0.0], dtype=np.float32))
+    np.testing.assert_array_equal(y, raw)
+    assert apply_gate_db(y, None) is y
+
+
+def test_content_anchor_finds_template_after_lead_in():
+    sr = 16000
+    a, _, b = _noise_after_tone(sr, lead_sec=3.0, seconds=6.0)
+    best_b = find_content_anchor(a, b, sr, template_sec=4.0, hop_sec=0.1, min_sim=0.999)
+    assert best_b is not None
+    assert abs(best_b - 3.0) < 0.2
+
+
+def test_content_anchor_returns_none_without_match():
+    sr = 16000
+    a, lead, _ = _noise_after_tone(sr, lead_sec=3.0, seconds=6.0)
+    assert find_content_anchor(a, lead, sr, template_sec=4.0, hop_sec=0.1, min_sim=0.9) is None
+
+
+def test_xcorr_recovers_known_delay():
+    sr = 8000
+    rng = np.random.default_rng(1)
+    a = rng.standard_normal(sr * 2).astype(np.float32)
+    delay = 1234
+    b = np.concatenate([np.zeros(delay, dtype=np.float32), a])
+    offset_sec, lags_sec, corr_norm = estimate_offset_seconds(a, b, sr, max_search=1.0)
+    assert abs(offset_sec - delay / sr) < 1.0 / sr
+    assert lags_sec.shape == corr_norm.shape
+    assert corr_norm.max() > 0.9
+
+
+def test_multirate_xcorr_matches_full_rate_delay():
+    sr = 48000
+    rng = np.random.default_rng(2)
+    a = rng.standard_normal(sr * 3).astype(np.float32)
+    delay = 12345
+    b = np.concatenate([np.zeros(delay, dtype=np.float32), a])
+    offset_sec, lags_sec, corr_norm = estimate_offset_multirate(a, b, sr, max_search=1.0)
+    assert abs(offset_sec - delay / sr) < 0.5 / sr
+    assert lags_sec.shape == corr_norm.shape
+
+
+def test_xcorr_peak_is_refined_below_one_sample():
+    sr = 8000
+    rng = np.random.default_rng(4)
+    # Band-limited noise, delayed by a fractional number of samples
+    x = np.convolve(rng.standard_normal(sr * 2), np.hanning(9), mode="same")
+    t = np.arange(x.size, dtype=np.float64)
+    delay = 100.4
+    a = x.astype(np.float32)
+    b = np.interp(t - delay, t, x, left=0.0).astype(np.float32)
+    offset_sec, _, _ = estimate_offset_seconds(a, b, sr, max_search=0.1)
+    assert abs(offset_sec * sr - delay) < 0.25
+
+
+@pytest.mark.parametrize(
+    "a_len, b_len, max_search",
+    [(1000, 1500, None), (1500, 1000, 0.01), (3000, 9000, 3.0), (9000, 3000, 0.2), (7, 1, None)],
+)
+def test_xcorr_band_matches_reference_correlation(a_len, b_len, max_search):
+    sr = 1000
+    rng = np.random.default_rng(3)
+    a = rng.standard_normal(a_len).astype(np.float32)
+    b = rng.standard_normal(b_len).astype(np.float32)
+    _, lags_sec, corr_norm = estimate_offset_seconds(a, b, sr, max_search)
+
+    a0 = a - a.mean()
+    b0 = b - b.mean()
+    full = spsig.correlate(a0, b0, mode="full", method="direct")
+    lags = np.arange(-b_len + 1, a_len)
+    max_lag = int(max_search * sr) if max_search else min(a_len, b_len) - 1
+    keep = (lags >= -max_lag) & (lags <= max_lag)
+    denom = np.sqrt(np.sum(a0 * a0) * np.sum(b0 * b0)) + 1e-12
+
+    assert corr_norm.flags.c_contiguous
+    np.testing.assert_allclose(corr_norm, full[keep] / denom, atol=1e-5)
+    np.testing.assert_allclose(lags_sec, lags[keep] / sr, atol=1e-6)
+
+
+def test_zero_offset_stream_copies_matching_wav(tmp_path: Path):
+    sr = 8000
+    pcm16 = tmp_path / "pcm16.wav"
+    stereo = tmp_path / "stereo.wav"
+    sf.write(pcm16, np.zeros(sr, dtype=np.float32), sr, subtype="PCM_16")
+    sf.write(stereo, np.zeros((sr, 2), dtype=np.float32), sr, subtype="PCM_16")
+
+    def cmd_for(path: Path) -> str:
+        return build_align_command(
+            inhouse_path="ref.wav",
+            external_path=str(path),
+            sr=sr,
+            mode="external_to_inhouse",
+            offset_sec=0.0,
+            prefer_trim=False,
+            out_audio="out.wav",
+        )
+
+    assert "-c:a copy" in cmd_for(pcm16)
+    assert "-c:a pcm_s16le" in cmd_for(stereo)
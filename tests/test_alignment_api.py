@@ -1,3 +1,4 @@
+import json
 from pathlib import Path
 
 import numpy as np
@@ -63,3 +64,35 @@ def test_alignment_job_lifecycle(tmp_path: Path):
     # URLs should be relative to /media
     assert body["inhouse_url"].startswith("/media/")
     assert body["external_url"].startswith("/media/")
+
+    # Retention metadata lands in the job JSON and the purge index
+    from app.routes import alignment
+
+    job = json.loads(alignment._job_path(job_id).read_text(encoding="utf-8"))
+    assert job["created_at"] and job["pinned"] is False
+    rows = [json.loads(line) for line in alignment.INDEX_PATH.read_text(encoding="utf-8").splitlines()]
+    assert {"job_id": job_id, "created_at": job["created_at"], "expires_at": None,
+            "has_raw_audio": True, "pinned": False} in rows
+
+
+def test_finished_job_is_on_disk_before_leaving_memory(monkeypatch):
+    from app.routes import alignment
+
+    job_id = "race-check"
+    alignment._write_job(job_id, {"status": "queued", "result": None})
+    alignment._write_job(job_id, {"status": "running", "result": None})
+
+    seen = []
+    real_replace = alignment.os.replace
+
+    def replace_and_read(src, dst):
+        real_replace(src, dst)
+        # A reader right after the file lands still sees live state
+        seen.append(alignment._read_job(job_id)["status"])
+
+    monkeypatch.setattr(alignment.os, "replace", replace_and_read)
+    alignment._write_job(job_id, {"status": "completed", "result": None})
+
+    assert seen == ["running"]
+    assert alignment._read_job(job_id)["status"] == "completed"
+    assert job_id not in alignment._JOBS
@@ -0,0 +1,17 @@
+import hashlib
+import json
+from pathlib import Path
+
+from app.services.alignment_service import _write_file_meta
+
+
+def test_file_meta_records_size_and_sha256(tmp_path: Path):
+    audio = tmp_path / "aligned.wav"
+    payload = b"RIFF" + bytes(range(256)) * 5000
+    audio.write_bytes(payload)
+
+    meta_path = _write_file_meta(audio)
+
+    assert meta_path == tmp_path / "aligned.wav.meta"
+    meta = json.loads(meta_path.read_text(encoding="utf-8"))
+    assert meta == {"size": len(payload), "sha256": hashlib.sha256(payload).hexdigest()}
@@ -0,0 +1,114 @@
+import datetime as dt
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+import purge_jobs
+
+
+@pytest.fixture
+def media_root(tmp_path: Path, monkeypatch) -> Path:
+    monkeypatch.setattr(purge_jobs, "JOBS_DIR", tmp_path / "jobs")
+    monkeypatch.setattr(purge_jobs, "UPLOADS_DIR", tmp_path / "uploads")
+    monkeypatch.setattr(purge_jobs, "RESULTS_DIR", tmp_path / "results")
+    return tmp_path
+
+
+def _make_job(root: Path, job_id: str, **fields) -> None:
+    (root / "jobs").mkdir(parents=True, exist_ok=True)
+    (root / "jobs" / f"{job_id}.json").write_text(json.dumps(fields), encoding="utf-8")
+    for sub in ("inhouse", "external"):
+        d = root / "uploads" / job_id / sub
+        d.mkdir(parents=True)
+        (d / "audio.wav").write_bytes(b"RIFF")
+    (root / "results" / job_id).mkdir(parents=True)
+    (root / "results" / job_id / "spectrogram_inhouse.png").write_bytes(b"PNG")
+
+
+def test_purge_job_removes_nested_uploads_and_results(media_root: Path):
+    _make_job(media_root, "abc")
+    assert purge_jobs.purge_job("abc", dry_run=True) == (1, 1, 1)
+    assert (media_root / "uploads" / "abc").is_dir()
+
+    assert purge_jobs.purge_job("abc") == (1, 1, 1)
+    assert not (media_root / "jobs" / "abc.json").exists()
+    assert not (media_root / "uploads" / "abc").exists()
+    assert not (media_root / "results" / "abc").exists()
+
+
+def test_purge_raw_audio_keeps_job_and_results(media_root: Path):
+    _make_job(media_root, "abc")
+    assert purge_jobs.purge_raw_audio("abc") == 1
+    assert not (media_root / "uploads" / "abc").exists()
+    assert (media_root / "jobs" / "abc.json").is_file()
+    assert (media_root / "results" / "abc").is_dir()
+
+
+@pytest.mark.parametrize("age_days, expected", [(29, None), (31, "raw"), (89, "raw"), (91, "job")])
+def test_retention_action_counts_days_from_creation(age_days, expected, monkeypatch):
+    monkeypatch.setattr(purge_jobs, "JOB_RETENTION_DAYS", 90)
+    monkeypatch.setattr(purge_jobs, "RAW_AUDIO_ONLY_DAYS", 30)
+    now = dt.datetime.now(dt.timezone.utc)
+    job_cutoff = now - dt.timedelta(days=90)
+    job = {"created_at": (now - dt.timedelta(days=age_days)).isoformat()}
+    assert purge_jobs.retention_action(job, job_cutoff, now) == expected
+
+
+def test_retention_action_honours_expires_at():
+    now = dt.datetime.now(dt.timezone.utc)
+    job_cutoff = now - dt.timedelta(days=purge_jobs.JOB_RETENTION_DAYS)
+    job = {"created_at": now.isoformat(), "expires_at": (now - dt.timedelta(days=1)).isoformat()}
+    assert purge_jobs.retention_action(job, job_cutoff, now) == "raw"
+    job["expires_at"] = (now + dt.timedelta(days=1)).isoformat()
+    assert purge_jobs.retention_action(job, job_cutoff, now) is None
+
+
+def test_main_applies_retention_policy(media_root: Path, monkeypatch, capsys):
+    now = dt.datetime.now(dt.timezone.utc)
+    _make_job(media_root, "old", created_at=(now - dt.timedelta(days=400)).isoformat())
+    # Well clear of the raw-audio threshold on both sides
+    _make_job(media_root, "raw", created_at=(now - dt.timedelta(days=45)).isoformat())
+    _make_job(media_root, "not_due", created_at=(now - dt.timedelta(days=15)).isoformat())
+    _make_job(media_root, "pinned", created_at=(now - dt.timedelta(days=400)).isoformat(), pinned=True)
+    _make_job(media_root, "fresh", created_at=now.isoformat())
+
+    monkeypatch.setattr(sys, "argv", ["purge_jobs.py"])
+    purge_jobs.main()
+
+    assert not (media_root / "jobs" / "old.json").exists()
+    assert (media_root / "jobs" / "raw.json").is_file()
+    assert not (media_root / "uploads" / "raw").exists()
+    assert (media_root / "uploads" / "not_due").is_dir()
+    assert (media_root / "uploads" / "pinned").is_dir()
+    assert (media_root / "uploads" / "fresh").is_dir()
+
+    out = capsys.readouterr().out
+    assert "Jobs deleted:       1" in out
+    assert "Raw-only purged:    1" in out
+
+
+def test_index_rows_prescreen_jobs_and_are_rewritten(media_root: Path, monkeypatch):
+    now = dt.datetime.now(dt.timezone.utc)
+    old = (now - dt.timedelta(days=400)).isoformat()
+    # Job JSONs without retention fields: only the index knows their age
+    _make_job(media_root, "old")
+    _make_job(media_root, "fresh")
+    rows = [
+        {"job_id": "old", "created_at": old, "expires_at": None, "has_raw_audio": True, "pinned": False},
+        {"job_id": "fresh", "created_at": now.isoformat(), "expires_at": None, "has_raw_audio": True, "pinned": False},
+        {"job_id": "gone", "created_at": old, "expires_at": None, "has_raw_audio": True, "pinned": False},
+    ]
+    index = media_root / "jobs" / purge_jobs.INDEX_NAME
+    index.write_text("".join(json.dumps(r) + "\n" for r in rows) + '{"job_id": "torn', encoding="utf-8")
+
+    loaded = purge_jobs.load_index()
+    assert set(loaded) == {"old", "fresh", "gone"}
+
+    monkeypatch.setattr(sys, "argv", ["purge_jobs.py"])
+    purge_jobs.main()
+
+    assert not (media_root / "jobs" / "old.json").exists()
+    assert (media_root / "jobs" / "fresh.json").is_file()
+    assert set(purge_jobs.load_index()) == {"fresh"}
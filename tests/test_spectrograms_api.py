@@ -0,0 +1,180 @@
+import os
+import uuid
+from pathlib import Path
+
+import librosa
+import numpy as np
+import pytest
+import soundfile as sf
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from PIL import Image
+
+from app.config import settings
+from app.routes.alignment import _write_job
+from app.routes import spectrograms
+from app.routes.spectrograms import _amplitude_to_db, _log_freq_matrix, router
+
+
+app = FastAPI()
+app.include_router(router)
+client = TestClient(app)
+
+
+def _make_job(with_audio: bool = True, with_stft: bool = True) -> str:
+    job_id = str(uuid.uuid4())
+    _write_job(job_id, {"status": "completed", "result": None})
+
+    results_dir = settings.MEDIA_ROOT / settings.RESULTS_DIR_NAME / job_id
+    results_dir.mkdir(parents=True, exist_ok=True)
+
+    sr = 8000
+    t = np.arange(sr * 2) / float(sr)
+    x = (0.1 * np.sin(2 * np.pi * 440.0 * t)).astype("float32")
+
+    if with_audio:
+        inhouse_dir = settings.MEDIA_ROOT / settings.UPLOAD_DIR_NAME / job_id / "inhouse"
+        inhouse_dir.mkdir(parents=True, exist_ok=True)
+        sf.write(inhouse_dir / "inhouse.wav", x, sr)
+
+    if with_stft:
+        S_mag = np.abs(np.fft.rfft(x[: 512 * 30].reshape(30, 512), axis=1)).T
+        np.savez_compressed(results_dir / "stft_inhouse.npz", S_mag=S_mag, sr=sr, hop_length=512)
+
+    return job_id
+
+
+def _assert_png(resp) -> None:
+    assert resp.status_code == 200
+    assert resp.content[:8] == b"\x89PNG\r\n\x1a\n"
+
+
+def test_long_view_from_raw_audio():
+    job_id = _make_job(with_stft=False)
+    resp = client.get(f"/api/v1/spectrograms/{job_id}", params={"track": "inhouse", "view": "long"})
+    _assert_png(resp)
+
+
+def test_highres_view_from_cached_stft():
+    job_id = _make_job(with_audio=False)
+    resp = client.get(f"/api/v1/spectrograms/{job_id}", params={"track": "inhouse", "view": "highRes"})
+    _assert_png(resp)
+
+
+def test_cached_view_prefers_memory_mapped_npy():
+    job_id = _make_job(with_audio=False)
+    results_dir = settings.MEDIA_ROOT / settings.RESULTS_DIR_NAME / job_id
+    with np.load(results_dir / "stft_inhouse.npz") as data:
+        np.save(results_dir / "stft_inhouse.npy", data["S_mag"].astype(np.float32))
+    resp = client.get(f"/api/v1/spectrograms/{job_id}", params={"track": "inhouse", "view": "long"})
+    _assert_png(resp)
+
+
+def test_cached_view_accepts_time_freq_layout():
+    job_id = _make_job(with_audio=False)
+    stft_path = settings.MEDIA_ROOT / settings.RESULTS_DIR_NAME / job_id / "stft_inhouse.npz"
+    with np.load(stft_path) as data:
+        S_mag = data["S_mag"]
+    np.savez_compressed(stft_path, S_mag=S_mag.T, sr=8000, hop_length=512, layout="time_freq")
+    resp = client.get(f"/api/v1/spectrograms/{job_id}", params={"track": "inhouse", "view": "long"})
+    _assert_png(resp)
+
+
+@pytest.mark.parametrize("flag", ["decorated", "labels"])
+def test_matplotlib_views(flag):
+    job_id = _make_job(with_audio=False)
+    resp = client.get(
+        f"/api/v1/spectrograms/{job_id}",
+        params={"track": "inhouse", "view": "long", flag: "true"},
+    )
+    _assert_png(resp)
+
+
+def test_failed_render_leaves_no_png(tmp_path: Path, monkeypatch):
+    def truncated_render(S_db, sr, out_path, figsize, dpi):
+        out_path.write_bytes(b"\x89PNG\r\n")
+        raise OSError("disk full")
+
+    monkeypatch.setattr(spectrograms, "_render_spec_png", truncated_render)
+    out_path = tmp_path / "spectrogram_inhouse_long.png"
+    with pytest.raises(OSError):
+        spectrograms._save_spectrogram_png(
+            np.zeros((5, 5), dtype=np.float32), 8000, 512, out_path, (1, 1), 10,
+            title="t", decorated=False,
+        )
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.parametrize("scale", [1.0, 1e-7, 0.0])
+def test_amplitude_to_db_matches_librosa(scale):
+    rng = np.random.default_rng(5)
+    S = (scale * np.abs(rng.standard_normal((257, 40)))).astype(np.float32)
+    S[0, :] = 0.0  # below the top_db floor
+    expected = librosa.amplitude_to_db(S, ref=np.max)
+    np.testing.assert_allclose(_amplitude_to_db(S), expected, atol=1e-3)
+
+    out = _amplitude_to_db(S, out=S)
+    assert out is S
+    np.testing.assert_allclose(S, expected, atol=1e-3)
+
+
+def test_amplitude_to_db_numexpr_matches_librosa(monkeypatch):
+    ne = pytest.importorskip("numexpr")
+    monkeypatch.setattr(spectrograms, "numexpr", ne)
+    rng = np.random.default_rng(7)
+    S = np.abs(rng.standard_normal((40, 257))).astype(np.float32)
+    S[:, 0] = 0.0  # below the top_db floor
+    expected = librosa.amplitude_to_db(S, ref=np.max)
+    np.testing.assert_allclose(_amplitude_to_db(S), expected, atol=1e-3)
+
+    # Transposed (non-contiguous) in-place, as in the time_freq fallback
+    S_t = S.T
+    out = _amplitude_to_db(S_t, out=S_t)
+    assert out is S_t
+    np.testing.assert_allclose(S_t, expected.T, atol=1e-3)
+
+
+def test_log_freq_matrix_interpolates_onto_log_rows():
+    sr, n_bins, height = 8000, 257, 64
+    W = _log_freq_matrix(sr, n_bins, height)
+    assert W.shape == (height, n_bins)
+    np.testing.assert_allclose(np.asarray(W.sum(axis=1)).ravel(), 1.0, rtol=1e-6)
+
+    # A ramp over bin index maps to each row's fractional bin position
+    rows = W @ np.arange(n_bins, dtype=np.float32)
+    hz = rows * (sr / 2) / (n_bins - 1)
+    np.testing.assert_allclose(hz[[0, -1]], [20.0, sr / 2], rtol=1e-4)
+    assert np.all(np.diff(np.log(hz)) > 0)
+
+
+def test_unknown_job_is_404():
+    resp = client.get(f"/api/v1/spectrograms/{uuid.uuid4()}")
+    assert resp.status_code == 404
+
+
+def test_repeat_request_with_etag_is_304():
+    job_id = _make_job(with_audio=False)
+    default_png = settings.MEDIA_ROOT / settings.RESULTS_DIR_NAME / job_id / "spectrogram_inhouse.png"
+    Image.new("RGB", (4, 4)).save(default_png)
+    params = {"track": "inhouse", "view": "default"}
+    first = client.get(f"/api/v1/spectrograms/{job_id}", params=params)
+    _assert_png(first)
+    etag = first.headers["etag"]
+    assert etag.startswith('W/"')
+
+    again = client.get(f"/api/v1/spectrograms/{job_id}", params=params, headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.content == b""
+
+
+def test_rendered_png_is_reused_until_source_changes():
+    job_id = _make_job(with_audio=False)
+    url = f"/api/v1/spectrograms/{job_id}"
+    params = {"track": "inhouse", "view": "long"}
+    etag = client.get(url, params=params).headers["etag"]
+    assert client.get(url, params=params).headers["etag"] == etag
+
+    stft_path = settings.MEDIA_ROOT / settings.RESULTS_DIR_NAME / job_id / "stft_inhouse.npz"
+    future = stft_path.stat().st_mtime + 10
+    os.utime(stft_path, (future, future))
+    assert client.get(url, params=params).headers["etag"] != etag